@@ -1,6 +1,6 @@
 from .nfe_parser import parse_nfe_xml, parse_nfe_xml_bytes
-from .gnre_xml import build_lote_xml, build_lote_consulta_xml, build_consulta_resultado_xml, evaluate_gnre_need, build_lote_xml_with_config, build_lote_xml_multiplas_receitas, MULTIPLAS_RECEITAS_UFS, needs_multiplas_receitas, generate_gnre_receipts, emit_gnre_receipt, consult_gnre_receipt
+from .gnre_xml import build_lote_xml, build_lote_xml_bytes, build_lote_xml_batch, build_lote_consulta_xml, build_consulta_resultado_xml, evaluate_gnre_need, build_lote_xml_with_config, build_lote_xml_multiplas_receitas, MULTIPLAS_RECEITAS_UFS, needs_multiplas_receitas, generate_gnre_receipts, emit_gnre_receipt, consult_gnre_receipt
 from .gnre_ws import build_soap_envelope_tlote, build_soap_envelope, post_soap, ssl_context_from_pfx_bytes, get_endpoints, parse_tr_ret_lote, parse_tresult_lote, parse_result_status, extract_linha_digitavel_and_pdf, GNREError
 from .dua_es import get_dua_es_endpoints, build_soap_envelope_dua_es, emit_dua_es, consult_dua_es, generate_dua_es_receipts, download_boleto_dua_es, consult_area_servico_dua_es, consult_municipio_dua_es, build_dua_es_emissao_xml, build_dua_es_consulta_xml, RECEITA_TO_CSERV, get_boleto_url_dua_es, download_boleto_html_dua_es
 from .receipts import generate_receipts, consult_receipts
-__all__ = ["parse_nfe_xml", "parse_nfe_xml_bytes", "build_lote_xml", "build_lote_consulta_xml", "build_consulta_resultado_xml", "evaluate_gnre_need", "build_lote_xml_with_config", "build_lote_xml_multiplas_receitas", "MULTIPLAS_RECEITAS_UFS", "needs_multiplas_receitas", "generate_gnre_receipts", "emit_gnre_receipt", "consult_gnre_receipt", "build_soap_envelope_tlote", "build_soap_envelope", "post_soap", "ssl_context_from_pfx_bytes", "get_endpoints", "parse_tr_ret_lote", "parse_tresult_lote", "parse_result_status", "extract_linha_digitavel_and_pdf", "GNREError", "get_dua_es_endpoints", "build_soap_envelope_dua_es", "emit_dua_es", "consult_dua_es", "generate_dua_es_receipts", "generate_receipts", "download_boleto_dua_es", "consult_area_servico_dua_es", "consult_municipio_dua_es", "build_dua_es_emissao_xml", "build_dua_es_consulta_xml", "RECEITA_TO_CSERV", "get_boleto_url_dua_es", "download_boleto_html_dua_es", "consult_receipts"]
+__all__ = ["parse_nfe_xml", "parse_nfe_xml_bytes", "build_lote_xml", "build_lote_xml_bytes", "build_lote_xml_batch", "build_lote_consulta_xml", "build_consulta_resultado_xml", "evaluate_gnre_need", "build_lote_xml_with_config", "build_lote_xml_multiplas_receitas", "MULTIPLAS_RECEITAS_UFS", "needs_multiplas_receitas", "generate_gnre_receipts", "emit_gnre_receipt", "consult_gnre_receipt", "build_soap_envelope_tlote", "build_soap_envelope", "post_soap", "ssl_context_from_pfx_bytes", "get_endpoints", "parse_tr_ret_lote", "parse_tresult_lote", "parse_result_status", "extract_linha_digitavel_and_pdf", "GNREError", "get_dua_es_endpoints", "build_soap_envelope_dua_es", "emit_dua_es", "consult_dua_es", "generate_dua_es_receipts", "generate_receipts", "download_boleto_dua_es", "consult_area_servico_dua_es", "consult_municipio_dua_es", "build_dua_es_emissao_xml", "build_dua_es_consulta_xml", "RECEITA_TO_CSERV", "get_boleto_url_dua_es", "download_boleto_html_dua_es", "consult_receipts"]
@@ -1,10 +1,13 @@
 from __future__ import annotations
-from typing import Optional, Dict, Any
-import xml.etree.ElementTree as ET
+from typing import NamedTuple, Optional, Dict, Any
 from decimal import Decimal, InvalidOperation
 from datetime import datetime, date, timedelta
 import calendar
+import functools
 import json
+import re
+import sys
+import time
 from pathlib import Path
 from .gnre_ws import GNREError
 from decimal import Decimal
@@ -12,20 +15,85 @@ from decimal import Decimal
 GNRE_NS = "http://www.gnre.pe.gov.br"
 MULTIPLAS_RECEITAS_UFS: frozenset = frozenset({"RJ", "RO", "PE", "SC"})
 
+# Códigos de receita comparados no hot path; internados para que a igualdade
+# resolva por identidade de ponteiro antes de comparar char a char.
+_R_DIFAL = sys.intern("100102")
+_R_ST = sys.intern("100099")
+_R_ST_COM = sys.intern("100048")
+_R_FCP = sys.intern("100129")
+
+# Conjuntos de enum testados por chamada; construídos uma vez no import em vez
+# de realocar o set literal a cada invocação (o de receitas usa nomes, que o
+# compilador não consegue congelar em constante).
+_R_ST_SET = frozenset((_R_ST, _R_ST_COM))
+_DOC_TIPOS_CHAVE = frozenset(("22", "24"))
+_TIPOS_CONSULTA = frozenset(("C", "N", "D", "CD", "ND", "CR", "NR"))
+_SIM_NAO = frozenset(("S", "N"))
+_AMB_PRODUCAO = frozenset(("1", "producao"))
+_AMB_TESTE = frozenset(("2", "teste"))
+
+_NON_DIGIT_RE = re.compile(r"\D+")
+_RECEITA_RE = re.compile(r"\d{6}")
+_CHAVE_RE = re.compile(r"\d{1,44}")
+
 def _digits(s: Optional[str]) -> str:
-    return "".join(ch for ch in (s or "") if ch.isdigit())
+    # Uma passada no engine C de regex em vez de um generator por caractere.
+    return _NON_DIGIT_RE.sub("", s or "")
+
+# Tabelas de escape para a escrita direta de fragmentos XML (sem ElementTree).
+# Valores sabidamente seguros (receitas/chaves validadas por regex, dígitos de
+# _digits/_mun5, f"{...:.2f}" e literais) são escritos crus pelos builders;
+# apenas strings vindas do usuário passam por _xml_escape/_escape_attr.
+_ESCAPE_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", "\r": "&#13;"})
+_ESCAPE_ATTR_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "\r": "&#13;", "\n": "&#10;", "\t": "&#09;"})
+
+@functools.lru_cache(maxsize=4096)
+def _xml_escape_cached(s: str) -> str:
+    return s.translate(_ESCAPE_TABLE)
+
+def _xml_escape(s: str) -> str:
+    # Valores curtos (UFs, receitas, CNPJs) repetem muito em lotes: cacheia o
+    # resultado do escape. Strings longas (razaoSocial/endereco) ficam fora do
+    # cache para não crescer sem limite.
+    if len(s) > 64:
+        return s.translate(_ESCAPE_TABLE)
+    return _xml_escape_cached(s)
+
+def _escape_attr(s: str) -> str:
+    return s.translate(_ESCAPE_ATTR_TABLE)
+
+_D0 = Decimal("0")
 
 def _dec(value: Optional[str]) -> Decimal:
+    if isinstance(value, Decimal):
+        return value
     if not value:
-        return Decimal("0")
+        return _D0
+    s = value if isinstance(value, str) else str(value)
     try:
-        return Decimal(str(value))
+        return Decimal(s)
     except (InvalidOperation, ValueError):
-        return Decimal("0")
+        return _D0
 
 def _date_only(iso: Optional[str]) -> Optional[str]:
     if not iso:
         return None
+    # Caminho rápido: o prefixo já está em YYYY-MM-DD (caso típico de dhEmi);
+    # valida só os 10 primeiros caracteres em vez de construir um datetime
+    # completo. Datas malformadas caem no caminho lento e retornam None.
+    if (
+        len(iso) >= 10
+        and iso[4] == "-"
+        and iso[7] == "-"
+        and iso[:4].isdigit()
+        and iso[5:7].isdigit()
+        and iso[8:10].isdigit()
+    ):
+        try:
+            date.fromisoformat(iso[:10])
+            return iso[:10]
+        except ValueError:
+            pass
     try:
         dt = datetime.fromisoformat(iso.replace("Z", "+00:00"))
         return dt.date().isoformat()
@@ -47,6 +115,11 @@ def _mun5(cmun: Optional[str]) -> Optional[str]:
     if len(s) > 5:
         return s[-5:]
     return None
+
+try:  # acelerador opcional compilado (ver gnre_xml_fast.pyx / setup.py)
+    from .gnre_xml_fast import _digits, _mun5, _xml_escape  # type: ignore[no-redef]  # noqa: F811
+except ImportError:
+    pass
 _UF_ADDITIONAL = None
 def _load_additional_fields() -> Dict[str, Any]:
     global _UF_ADDITIONAL
@@ -57,8 +130,10 @@ def _load_additional_fields() -> Dict[str, Any]:
         except Exception:
             _UF_ADDITIONAL = {}
     return _UF_ADDITIONAL
-def _extra_value(titulo: str, dados_nfe: Dict[str, Optional[str]]) -> Optional[str]:
+def _extra_value(titulo: str, dados_nfe: Dict[str, Optional[str]], chave_digits: Optional[str] = None) -> Optional[str]:
     if "Chave de Acesso" in titulo:
+        if chave_digits is not None:
+            return chave_digits or None
         s = (dados_nfe.get("chave_nfe") or "")
         return _digits(s) if s else None
     if "Data de Emissão" in titulo:
@@ -90,6 +165,67 @@ def _adjust_vencimento_pr(dtven: str, today: date) -> str:
         adjusted = min_date
     return adjusted.isoformat()
 
+_today_cache: tuple = (0, date(1970, 1, 1), "1970-01-01")
+
+def _today() -> date:
+    """Data de hoje com cache de 1 segundo: tira o syscall de relógio e a
+    construção de datetime do caminho quente dos builders."""
+    global _today_cache
+    t = int(time.time())
+    if t != _today_cache[0]:
+        d = date.fromtimestamp(t)
+        _today_cache = (t, d, d.isoformat())
+    return _today_cache[1]
+
+def _today_iso() -> str:
+    _today()
+    return _today_cache[2]
+
+class _Computed(NamedTuple):
+    """Valores derivados da NF-e compartilhados entre evaluate_gnre_need e
+    build_lote_xml, para não re-parsear os mesmos Decimals duas vezes."""
+    vST: Decimal
+    vICMSUF: Decimal
+    vFCPUF: Decimal
+    vFCPST: Decimal
+    vprincipal: Decimal
+    vFCP_total: Decimal
+    v_total_item: Decimal
+    receita: Optional[str]
+    auto_receita: Optional[str]
+
+def _vprincipal_for(receita: Optional[str], vST: Decimal, vICMSUF: Decimal, vFCP_total: Decimal) -> Decimal:
+    if receita == _R_DIFAL:
+        return vICMSUF
+    if receita in _R_ST_SET:
+        return vST
+    if receita == _R_FCP:
+        return vFCP_total
+    return vST + vICMSUF
+
+def _compute(
+    dados_nfe: Dict[str, Optional[str]],
+    receita: Optional[str] = None,
+    valor_principal: Optional[str] = None,
+) -> _Computed:
+    vST = _dec(dados_nfe.get("valor_vST"))
+    vICMSUF = _dec(dados_nfe.get("valor_vICMSUFDest"))
+    vFCPUF = _dec(dados_nfe.get("valor_vFCPUFDest"))
+    vFCPST = _dec(dados_nfe.get("valor_vFCPST"))
+    vFCP_total = vFCPUF + vFCPST
+    if vICMSUF > _D0:
+        auto_receita = _R_DIFAL  # DIFAL Operação
+    elif vST > _D0:
+        auto_receita = _R_ST  # ST Operação
+    else:
+        auto_receita = None
+    r = receita if (receita and _RECEITA_RE.fullmatch(receita)) else None
+    if valor_principal is not None:
+        vprincipal = _dec(valor_principal)
+    else:
+        vprincipal = _vprincipal_for(r or auto_receita, vST, vICMSUF, vFCP_total)
+    return _Computed(vST, vICMSUF, vFCPUF, vFCPST, vprincipal, vFCP_total, vprincipal + vFCP_total, r, auto_receita)
+
 def evaluate_gnre_need(
     dados_nfe: Dict[str, Optional[str]],
     receita: Optional[str] = None,
@@ -100,10 +236,11 @@ def evaluate_gnre_need(
     id_dest = (dados_nfe.get("id_dest") or "").strip()
     ind_final = (dados_nfe.get("ind_final") or "").strip()
     ind_ie_dest = (dados_nfe.get("ind_ie_dest") or "").strip()
-    vST_nfe = _dec(dados_nfe.get("valor_vST"))
-    vICMSUF_nfe = _dec(dados_nfe.get("valor_vICMSUFDest"))
-    vFCPUF_nfe = _dec(dados_nfe.get("valor_vFCPUFDest"))
-    vFCPST_nfe = _dec(dados_nfe.get("valor_vFCPST"))
+    c = _compute(dados_nfe, receita, valor_principal)
+    vST_nfe = c.vST
+    vICMSUF_nfe = c.vICMSUF
+    vFCPUF_nfe = c.vFCPUF
+    vFCPST_nfe = c.vFCPST
     vICMS_int = _dec(dados_nfe.get("valor_vICMS"))
     vIPI = _dec(dados_nfe.get("valor_vIPI"))
     vPIS = _dec(dados_nfe.get("valor_vPIS"))
@@ -115,30 +252,23 @@ def evaluate_gnre_need(
     is_inter = (id_dest == "2")
     is_final = (ind_final == "1")
     is_nao_contrib = (ind_ie_dest == "9")
-    difal_ok = is_inter and is_final and is_nao_contrib and vICMSUF_nfe > Decimal("0")
-    fcp_ok = is_inter and is_final and is_nao_contrib and vFCPUF_nfe > Decimal("0")
-    st_ok = is_inter and vST_nfe > Decimal("0")
+    difal_ok = is_inter and is_final and is_nao_contrib and vICMSUF_nfe > _D0
+    fcp_ok = is_inter and is_final and is_nao_contrib and vFCPUF_nfe > _D0
+    st_ok = is_inter and vST_nfe > _D0
     guides = []
     if difal_ok:
-        guides.append({"receita": "100102", "valor": f"{vICMSUF_nfe:.2f}"})
+        guides.append({"receita": _R_DIFAL, "valor": f"{vICMSUF_nfe:.2f}"})
     if fcp_ok:
-        guides.append({"receita": "100129", "valor": f"{(vFCPUF_nfe + vFCPST_nfe):.2f}"})
+        guides.append({"receita": _R_FCP, "valor": f"{(vFCPUF_nfe + vFCPST_nfe):.2f}"})
     if st_ok:
-        guides.append({"receita": "100099", "valor": f"{vST_nfe:.2f}"})
-    if not (r.isdigit() and len(r) == 6) and guides:
+        guides.append({"receita": _R_ST, "valor": f"{vST_nfe:.2f}"})
+    if not _RECEITA_RE.fullmatch(r) and guides:
         r = guides[0]["receita"]
     if valor_principal is not None:
-        vprincipal = _dec(valor_principal)
+        vprincipal = c.vprincipal
     else:
-        if r == "100102":
-            vprincipal = vICMSUF_nfe
-        elif r in {"100099", "100048"}:
-            vprincipal = vST_nfe
-        elif r == "100129":
-            vprincipal = vFCPUF_nfe + vFCPST_nfe
-        else:
-            vprincipal = vST_nfe + vICMSUF_nfe
-    vFCP_total = vFCPUF_nfe + vFCPST_nfe
+        vprincipal = _vprincipal_for(r, vST_nfe, vICMSUF_nfe, c.vFCP_total)
+    vFCP_total = c.vFCP_total
     v_total_item = vprincipal + vFCP_total
     manual = (uf_dest == "SP" and uf_emit and uf_emit != uf_dest and bool(guides))
     dua_es = (uf_dest == "ES" and uf_emit and uf_emit != uf_dest and bool(guides))
@@ -159,11 +289,11 @@ def evaluate_gnre_need(
             "cofins": f"{vCOFINS:.2f}",
             "ibs": f"{vIBS:.2f}",
             "cbs": f"{vCBS:.2f}",
-            "total_taxes_estimation": f"{(vTotTrib if vTotTrib > Decimal('0') else (vICMS_int + vICMSUF_nfe + vST_nfe + vFCPUF_nfe + vFCPST_nfe + vIPI + vPIS + vCOFINS + vIBS + vCBS)):.2f}",
+            "total_taxes_estimation": f"{(vTotTrib if vTotTrib > _D0 else (vICMS_int + vICMSUF_nfe + vST_nfe + vFCPUF_nfe + vFCPST_nfe + vIPI + vPIS + vCOFINS + vIBS + vCBS)):.2f}",
         },
     }
 def _build_item(
-    itens_el: ET.Element,
+    out: list,
     uf: str,
     receita: str,
     dados_nfe: Dict[str, Optional[str]],
@@ -176,21 +306,26 @@ def _build_item(
     incluir_referencia: bool = True,
     incluir_valor_total: bool = True,
 ) -> None:
+    """Escreve os fragmentos de um <item> diretamente na lista `out`."""
     chave = (dados_nfe.get("chave_nfe") or "").strip()
-    _today = datetime.now().date()
+    # Os chamadores já validam a chave como só-dígitos, mas normalizamos uma
+    # vez aqui e reaproveitamos em documentoOrigem e nos camposExtras.
+    chave_digits = _digits(chave)
+    today = _today()
     try:
         _ven_date = date.fromisoformat(dtven)
-        _ref_date = _ven_date if (_ven_date.year, _ven_date.month) <= (_today.year, _today.month) else _today
+        _ref_date = _ven_date if (_ven_date.year, _ven_date.month) <= (today.year, today.month) else today
     except ValueError:
-        _ref_date = _today
+        _ref_date = today
     mes = f"{_ref_date.month:02d}"
     ano = str(_ref_date.year)
-    item = ET.SubElement(itens_el, f"{{{GNRE_NS}}}item")
-    rec = ET.SubElement(item, f"{{{GNRE_NS}}}receita")
-    rec.text = receita
+    out.append("<item><receita>")
+    out.append(receita)
+    out.append("</receita>")
     if detalhamento_receita:
-        det = ET.SubElement(item, f"{{{GNRE_NS}}}detalhamentoReceita")
-        det.text = detalhamento_receita
+        out.append("<detalhamentoReceita>")
+        out.append(_xml_escape(detalhamento_receita))
+        out.append("</detalhamentoReceita>")
     _det_entries = _load_detalhamento_map().get(uf) or []
     _auto_produto = next(
         (e.get("produto") for e in _det_entries if e.get("receita") == receita and e.get("produto")),
@@ -198,161 +333,203 @@ def _build_item(
     )
     _produto = produto or dados_nfe.get("produto") or _auto_produto
     if _produto:
-        prod = ET.SubElement(item, f"{{{GNRE_NS}}}produto")
-        prod.text = _produto
+        out.append("<produto>")
+        out.append(_xml_escape(_produto))
+        out.append("</produto>")
     doc_tipo = (doc_origem_tipo or "22").strip()
     if doc_tipo:
-        doc = ET.SubElement(item, f"{{{GNRE_NS}}}documentoOrigem", {"tipo": doc_tipo})
-        doc.text = _digits(chave) if doc_tipo in {"22", "24"} else _digits(dados_nfe.get("numero_nf") or chave)
+        out.append(f'<documentoOrigem tipo="{_escape_attr(doc_tipo)}">')
+        out.append(chave_digits if doc_tipo in _DOC_TIPOS_CHAVE else _digits(dados_nfe.get("numero_nf") or chave))
+        out.append("</documentoOrigem>")
     if incluir_referencia:
-        ref = ET.SubElement(item, f"{{{GNRE_NS}}}referencia")
-        ET.SubElement(ref, f"{{{GNRE_NS}}}periodo").text = "0"
-        ET.SubElement(ref, f"{{{GNRE_NS}}}mes").text = mes
-        ET.SubElement(ref, f"{{{GNRE_NS}}}ano").text = ano
-    ET.SubElement(item, f"{{{GNRE_NS}}}dataVencimento").text = dtven
-    ET.SubElement(item, f"{{{GNRE_NS}}}valor", {"tipo": "11"}).text = f"{vprincipal:.2f}"
-    if valor_fcp and valor_fcp > Decimal("0"):
-        ET.SubElement(item, f"{{{GNRE_NS}}}valor", {"tipo": "12"}).text = f"{valor_fcp:.2f}"
+        out.append("<referencia><periodo>0</periodo><mes>")
+        out.append(mes)
+        out.append("</mes><ano>")
+        out.append(ano)
+        out.append("</ano></referencia>")
+    out.append("<dataVencimento>")
+    out.append(_xml_escape(dtven))
+    out.append("</dataVencimento>")
+    out.append(f'<valor tipo="11">{vprincipal:.2f}</valor>')
+    if valor_fcp and valor_fcp > _D0:
+        out.append(f'<valor tipo="12">{valor_fcp:.2f}</valor>')
     if incluir_valor_total:
-        vtotal = vprincipal + (valor_fcp or Decimal("0"))
-        ET.SubElement(item, f"{{{GNRE_NS}}}valor", {"tipo": "21"}).text = f"{vtotal:.2f}"
-    if dados_nfe.get("destinatario_cnpj") or dados_nfe.get("destinatario_cpf"):
-        dest = ET.SubElement(item, f"{{{GNRE_NS}}}contribuinteDestinatario")
-        dest_id = ET.SubElement(dest, f"{{{GNRE_NS}}}identificacao")
-        if dados_nfe.get("destinatario_cnpj"):
-            ET.SubElement(dest_id, f"{{{GNRE_NS}}}CNPJ").text = dados_nfe.get("destinatario_cnpj")
-        elif dados_nfe.get("destinatario_cpf"):
-            ET.SubElement(dest_id, f"{{{GNRE_NS}}}CPF").text = dados_nfe.get("destinatario_cpf")
-        if dados_nfe.get("destinatario_nome"):
-            ET.SubElement(dest, f"{{{GNRE_NS}}}razaoSocial").text = dados_nfe.get("destinatario_nome")
-        if dados_nfe.get("destinatario_cod_mun"):
-            ET.SubElement(dest, f"{{{GNRE_NS}}}municipio").text = _mun5(dados_nfe.get("destinatario_cod_mun"))
+        vtotal = vprincipal + (valor_fcp or _D0)
+        out.append(f'<valor tipo="21">{vtotal:.2f}</valor>')
+    dest_cnpj = dados_nfe.get("destinatario_cnpj")
+    dest_cpf = dados_nfe.get("destinatario_cpf")
+    if dest_cnpj or dest_cpf:
+        out.append("<contribuinteDestinatario><identificacao>")
+        if dest_cnpj:
+            out.append("<CNPJ>")
+            out.append(_xml_escape(dest_cnpj))
+            out.append("</CNPJ>")
+        elif dest_cpf:
+            out.append("<CPF>")
+            out.append(_xml_escape(dest_cpf))
+            out.append("</CPF>")
+        out.append("</identificacao>")
+        dest_nome = dados_nfe.get("destinatario_nome")
+        if dest_nome:
+            out.append("<razaoSocial>")
+            out.append(_xml_escape(dest_nome))
+            out.append("</razaoSocial>")
+        dest_cod_mun = dados_nfe.get("destinatario_cod_mun")
+        if dest_cod_mun:
+            m = _mun5(dest_cod_mun)
+            out.append(f"<municipio>{m}</municipio>" if m else "<municipio />")
+        out.append("</contribuinteDestinatario>")
     extras_map = _load_additional_fields()
     extras = [
         {"codigo": e.get("codigo"), "valor": v}
         for e in extras_map.get(uf, [])
         if e.get("receita") == receita
-        for v in [_extra_value(e.get("titulo") or "", dados_nfe)]
+        for v in [_extra_value(e.get("titulo") or "", dados_nfe, chave_digits)]
         if v
     ]
     if extras:
-        campos = ET.SubElement(item, f"{{{GNRE_NS}}}camposExtras")
+        out.append("<camposExtras>")
         for ex in extras:
-            ce = ET.SubElement(campos, f"{{{GNRE_NS}}}campoExtra")
-            ET.SubElement(ce, f"{{{GNRE_NS}}}codigo").text = str(ex["codigo"])
-            ET.SubElement(ce, f"{{{GNRE_NS}}}valor").text = ex["valor"]
+            out.append("<campoExtra><codigo>")
+            out.append(_xml_escape(str(ex["codigo"])))
+            out.append("</codigo><valor>")
+            out.append(_xml_escape(ex["valor"]))
+            out.append("</valor></campoExtra>")
+        out.append("</camposExtras>")
+    out.append("</item>")
 
-def build_lote_xml(
+@functools.lru_cache(maxsize=64)
+def _emitente_template(flags: tuple) -> str:
+    """Template do bloco <contribuinteEmitente> especializado por combinação
+    de campos presentes. Num lote, a mesma combinação se repete NFe após NFe,
+    então o template compilado substitui a cascata de ifs por um format_map."""
+    has_cnpj, has_cpf, has_ie, has_razao, has_end, has_mun, has_uf, has_cep, has_tel = flags
+    parts = ["<contribuinteEmitente><identificacao>"]
+    if has_cnpj:
+        parts.append("<CNPJ>{cnpj}</CNPJ>")
+    elif has_cpf:
+        parts.append("<CPF>{cpf}</CPF>")
+    if has_ie:
+        parts.append("<IE>{ie}</IE>")
+    parts.append("</identificacao>")
+    if has_razao:
+        parts.append("<razaoSocial>{razao}</razaoSocial>")
+    if has_end:
+        parts.append("<endereco>{endereco}</endereco>")
+    if has_mun:
+        parts.append("{municipio}")
+    if has_uf:
+        parts.append("<uf>{uf}</uf>")
+    if has_cep:
+        parts.append("<cep>{cep}</cep>")
+    if has_tel:
+        parts.append("<telefone>{telefone}</telefone>")
+    parts.append("</contribuinteEmitente>")
+    return "".join(parts)
+
+def _build_contribuinte_emitente(
+    out: list,
+    dados_nfe: Dict[str, Optional[str]],
+    uf: str,
+    razao_social_emitente: Optional[str] = None,
+) -> None:
+    """Escreve o bloco <contribuinteEmitente> compartilhado pelos lotes."""
+    cnpj = dados_nfe.get("emitente_cnpj")
+    cpf = dados_nfe.get("emitente_cpf")
+    # IE: inclui quando a UF do emitente é igual à UF favorecida, ou se for substituto tributário (param futuro)
+    # aqui incluímos IE quando UF coincide; ajuste pode ser feito via param 'include_ie_substituto' (não exposto)
+    ie = dados_nfe.get("emitente_ie") if dados_nfe.get("uf_emitente") == uf else None
+    rs_text = razao_social_emitente or dados_nfe.get("emitente_nome")
+    endereco = dados_nfe.get("emitente_endereco")
+    cod_mun = dados_nfe.get("emitente_cod_mun")
+    uf_emit = dados_nfe.get("uf_emitente")
+    cep = dados_nfe.get("emitente_cep")
+    tel = dados_nfe.get("emitente_telefone")
+    flags = (
+        bool(cnpj), bool(cpf), bool(ie), bool(rs_text), bool(endereco),
+        bool(cod_mun), bool(uf_emit), bool(cep), bool(tel),
+    )
+    values: Dict[str, str] = {}
+    if cnpj:
+        values["cnpj"] = _xml_escape(cnpj)
+    elif cpf:
+        values["cpf"] = _xml_escape(cpf)
+    if ie:
+        values["ie"] = _xml_escape(ie)
+    if rs_text:
+        values["razao"] = _xml_escape(rs_text)
+    if endereco:
+        values["endereco"] = _xml_escape(endereco)
+    if cod_mun:
+        m = _mun5(cod_mun)
+        values["municipio"] = f"<municipio>{m}</municipio>" if m else "<municipio />"
+    if uf_emit:
+        values["uf"] = _xml_escape(uf_emit)
+    if cep:
+        values["cep"] = _xml_escape(cep)
+    if tel:
+        values["telefone"] = _xml_escape(tel)
+    out.append(_emitente_template(flags).format_map(values))
+
+def _append_guia(
+    out: list,
     dados_nfe: Dict[str, Optional[str]],
     uf_favorecida: Optional[str],
     receita: str,
     detalhamento_receita: Optional[str] = None,
     produto: Optional[str] = None,
     doc_origem_tipo: Optional[str] = None,
-    incluir_campo_107: bool = True,
     valor_principal: Optional[str] = None,
     data_vencimento: Optional[str] = None,
     razao_social_emitente: Optional[str] = None,
     data_pagamento: Optional[str] = None,
-) -> str:
-    uf = (uf_favorecida or dados_nfe.get("uf_destinatario") or "").strip()
-    _require(bool(uf), "ufFavorecida é obrigatória", {"uf_favorecida": uf, "dados_nfe_uf_destinatario": dados_nfe.get("uf_destinatario")})
-    # mapeamento automático de receita quando solicitado
-    vST_nfe = _dec(dados_nfe.get("valor_vST"))
-    vICMSUF_nfe = _dec(dados_nfe.get("valor_vICMSUFDest"))
-    if not (receita and receita.isdigit() and len(receita) == 6):
-        if vICMSUF_nfe > Decimal("0"):
-            receita = "100102"  # DIFAL Operação
-        elif vST_nfe > Decimal("0"):
-            receita = "100099"  # ST Operação
-        else:
-            _require(False, "receita deve ter 6 dígitos ou ser dedutível pelos valores da NF-e", {"valor_vICMSUFDest": str(vICMSUF_nfe), "valor_vST": str(vST_nfe)})
-    _require(bool(receita) and len(receita) == 6 and receita.isdigit(), "receita deve ter 6 dígitos", {"receita": receita})
-    ident_ok = bool(dados_nfe.get("emitente_cnpj")) or bool(dados_nfe.get("emitente_cpf"))
-    _require(ident_ok, "Emitente deve possuir CNPJ ou CPF", {"emitente_cnpj": dados_nfe.get("emitente_cnpj"), "emitente_cpf": dados_nfe.get("emitente_cpf")})
+) -> None:
+    """Escreve um <TDadosGNRE> completo em `out`. Corpo compartilhado entre
+    build_lote_xml (uma guia) e build_lote_xml_batch (N guias num lote só)."""
+    uf_dest = dados_nfe.get("uf_destinatario")
+    emit_cnpj = dados_nfe.get("emitente_cnpj")
+    emit_cpf = dados_nfe.get("emitente_cpf")
     chave = (dados_nfe.get("chave_nfe") or "").strip()
-    _require(bool(chave) and chave.isdigit() and 1 <= len(chave) <= 44, "documentoOrigem inválido", {"chave_nfe": chave})
+    uf = (uf_favorecida or uf_dest or "").strip()
+    # Validações inline num passe único antes de escrever qualquer fragmento:
+    # cada _require custa um frame extra com bool efêmero no caminho quente.
+    if not uf:
+        raise GNREError("ufFavorecida é obrigatória", details={"uf_favorecida": uf, "dados_nfe_uf_destinatario": uf_dest})
+    if not (emit_cnpj or emit_cpf):
+        raise GNREError("Emitente deve possuir CNPJ ou CPF", details={"emitente_cnpj": emit_cnpj, "emitente_cpf": emit_cpf})
+    if not _CHAVE_RE.fullmatch(chave):
+        raise GNREError("documentoOrigem inválido", details={"chave_nfe": chave})
+    c = _compute(dados_nfe, receita, valor_principal)
+    # mapeamento automático de receita quando solicitado
+    if not (receita and _RECEITA_RE.fullmatch(receita)):
+        receita = c.auto_receita
+        if not receita:
+            raise GNREError("receita deve ter 6 dígitos ou ser dedutível pelos valores da NF-e", details={"valor_vICMSUFDest": str(c.vICMSUF), "valor_vST": str(c.vST)})
+    if not _RECEITA_RE.fullmatch(receita):
+        raise GNREError("receita deve ter 6 dígitos", details={"receita": receita})
 
-    vFCPUF_nfe = _dec(dados_nfe.get("valor_vFCPUFDest"))
-    vFCPST_nfe = _dec(dados_nfe.get("valor_vFCPST"))
-    vFCP_total = vFCPUF_nfe + vFCPST_nfe
-    total_default = vST_nfe + vICMSUF_nfe  # por padrão não somar FCP sem regra explícita
-    # valor principal selecionado por receita
-    if valor_principal is not None:
-        vprincipal = _dec(valor_principal)
-    else:
-        if receita == "100102":
-            vprincipal = vICMSUF_nfe
-        elif receita == "100099":
-            vprincipal = vST_nfe
-        elif receita == "100048":
-            vprincipal = vST_nfe
-        elif receita == "100129":
-            vprincipal = vFCP_total
-        else:
-            vprincipal = total_default
+    # valor principal selecionado por receita (em _compute); por padrão não
+    # soma FCP sem regra explícita
+    vprincipal = c.vprincipal
     # FCP: opção de somar ao principal quando aplicável (parâmetro futuro pode ajustar)
     # Aqui optamos por somar FCP ao valorGNRE apenas quando principal está zerado e há FCP
-    _require(vprincipal >= Decimal("0.00"), "valor principal inválido", {"valor_principal": f"{vprincipal:.2f}", "receita": receita})
-    dtven = data_vencimento or _date_only(dados_nfe.get("data_emissao")) or datetime.now().date().isoformat()
+    if vprincipal < _D0:
+        raise GNREError("valor principal inválido", details={"valor_principal": f"{vprincipal:.2f}", "receita": receita})
+    dtven = data_vencimento or _date_only(dados_nfe.get("data_emissao")) or _today_iso()
     if uf == "PR":
-        dtven = _adjust_vencimento_pr(dtven, datetime.now().date())
-    mes = dtven[5:7]
-    ano = dtven[0:4]
-
-    ET.register_namespace("", GNRE_NS)
-    lote = ET.Element(f"{{{GNRE_NS}}}TLote_GNRE", {"versao": "2.00"})
-    guias = ET.SubElement(lote, f"{{{GNRE_NS}}}guias")
-    guia = ET.SubElement(guias, f"{{{GNRE_NS}}}TDadosGNRE", {"versao": "2.00"})
-
-    ufFav = ET.SubElement(guia, f"{{{GNRE_NS}}}ufFavorecida")
-    ufFav.text = uf
-
-    tipo = ET.SubElement(guia, f"{{{GNRE_NS}}}tipoGnre")
-    tipo.text = "0"
-
-    contrib_emit = ET.SubElement(guia, f"{{{GNRE_NS}}}contribuinteEmitente")
-    identificacao = ET.SubElement(contrib_emit, f"{{{GNRE_NS}}}identificacao")
-    if dados_nfe.get("emitente_cnpj"):
-        cnpj = ET.SubElement(identificacao, f"{{{GNRE_NS}}}CNPJ")
-        cnpj.text = dados_nfe.get("emitente_cnpj")
-    elif dados_nfe.get("emitente_cpf"):
-        cpf = ET.SubElement(identificacao, f"{{{GNRE_NS}}}CPF")
-        cpf.text = dados_nfe.get("emitente_cpf")
-    # IE: inclui quando a UF do emitente é igual à UF favorecida, ou se for substituto tributário (param futuro)
-    # aqui incluímos IE quando UF coincide; ajuste pode ser feito via param 'include_ie_substituto' (não exposto)
-    if dados_nfe.get("emitente_ie") and (dados_nfe.get("uf_emitente") == uf):
-        ie = ET.SubElement(identificacao, f"{{{GNRE_NS}}}IE")
-        ie.text = dados_nfe.get("emitente_ie")
-    if razao_social_emitente:
-        razao = ET.SubElement(contrib_emit, f"{{{GNRE_NS}}}razaoSocial")
-        razao.text = razao_social_emitente
-    elif dados_nfe.get("emitente_nome"):
-        razao = ET.SubElement(contrib_emit, f"{{{GNRE_NS}}}razaoSocial")
-        razao.text = dados_nfe.get("emitente_nome")
-    if dados_nfe.get("emitente_endereco"):
-        end = ET.SubElement(contrib_emit, f"{{{GNRE_NS}}}endereco")
-        end.text = dados_nfe.get("emitente_endereco")
-    if dados_nfe.get("emitente_cod_mun"):
-        mun = ET.SubElement(contrib_emit, f"{{{GNRE_NS}}}municipio")
-        mun.text = _mun5(dados_nfe.get("emitente_cod_mun"))
-    if dados_nfe.get("uf_emitente"):
-        uf_emit = ET.SubElement(contrib_emit, f"{{{GNRE_NS}}}uf")
-        uf_emit.text = dados_nfe.get("uf_emitente")
-    if dados_nfe.get("emitente_cep"):
-        cep = ET.SubElement(contrib_emit, f"{{{GNRE_NS}}}cep")
-        cep.text = dados_nfe.get("emitente_cep")
-    if dados_nfe.get("emitente_telefone"):
-        tel = ET.SubElement(contrib_emit, f"{{{GNRE_NS}}}telefone")
-        tel.text = dados_nfe.get("emitente_telefone")
-
-    itens = ET.SubElement(guia, f"{{{GNRE_NS}}}itensGNRE")
+        dtven = _adjust_vencimento_pr(dtven, _today())
+
+    out.append('<TDadosGNRE versao="2.00"><ufFavorecida>')
+    out.append(_xml_escape(uf))
+    out.append("</ufFavorecida><tipoGnre>0</tipoGnre>")
+    _build_contribuinte_emitente(out, dados_nfe, uf, razao_social_emitente)
+    out.append("<itensGNRE>")
     auto_det = detalhamento_receita or next(
         (e.get("codigo") for e in (_load_detalhamento_map().get(uf) or []) if e.get("receita") == receita),
         None,
     )
     _build_item(
-        itens,
+        out,
         uf=uf,
         receita=receita,
         dados_nfe=dados_nfe,
@@ -362,14 +539,89 @@ def build_lote_xml(
         detalhamento_receita=auto_det,
         produto=produto,
     )
-    valor_gnre = ET.SubElement(guia, f"{{{GNRE_NS}}}valorGNRE")
-    valor_gnre.text = f"{vprincipal:.2f}"
+    out.append("</itensGNRE>")
+    out.append(f"<valorGNRE>{vprincipal:.2f}</valorGNRE>")
     if data_pagamento:
-        dp_val = _adjust_vencimento_pr(data_pagamento, datetime.now().date()) if uf == "PR" else data_pagamento
-        dp = ET.SubElement(guia, f"{{{GNRE_NS}}}dataPagamento")
-        dp.text = dp_val
-    xml_str = ET.tostring(lote, encoding="utf-8", xml_declaration=False)
-    return xml_str.decode("utf-8")
+        dp_val = _adjust_vencimento_pr(data_pagamento, _today()) if uf == "PR" else data_pagamento
+        out.append("<dataPagamento>")
+        out.append(_xml_escape(dp_val))
+        out.append("</dataPagamento>")
+    out.append("</TDadosGNRE>")
+
+def build_lote_xml(
+    dados_nfe: Dict[str, Optional[str]],
+    uf_favorecida: Optional[str],
+    receita: str,
+    detalhamento_receita: Optional[str] = None,
+    produto: Optional[str] = None,
+    doc_origem_tipo: Optional[str] = None,
+    incluir_campo_107: bool = True,
+    valor_principal: Optional[str] = None,
+    data_vencimento: Optional[str] = None,
+    razao_social_emitente: Optional[str] = None,
+    data_pagamento: Optional[str] = None,
+) -> str:
+    out: list = [f'<TLote_GNRE xmlns="{GNRE_NS}" versao="2.00"><guias>']
+    _append_guia(
+        out,
+        dados_nfe,
+        uf_favorecida,
+        receita,
+        detalhamento_receita=detalhamento_receita,
+        produto=produto,
+        doc_origem_tipo=doc_origem_tipo,
+        valor_principal=valor_principal,
+        data_vencimento=data_vencimento,
+        razao_social_emitente=razao_social_emitente,
+        data_pagamento=data_pagamento,
+    )
+    out.append("</guias></TLote_GNRE>")
+    return "".join(out)
+
+def build_lote_xml_bytes(
+    dados_nfe: Dict[str, Optional[str]],
+    uf_favorecida: Optional[str],
+    receita: str,
+    **kwargs: Any,
+) -> bytes:
+    """Como build_lote_xml, mas retorna bytes UTF-8 prontos para o transporte.
+
+    Código de cliente HTTP que envia o lote direto (sem interpolar num
+    envelope SOAP str) deve preferir esta forma: a codificação acontece uma
+    única vez aqui, em vez de decode/encode no caminho do caller.
+    """
+    return build_lote_xml(dados_nfe, uf_favorecida, receita, **kwargs).encode("utf-8")
+
+def build_lote_xml_batch(items: list) -> str:
+    """Constrói um único TLote_GNRE com um <TDadosGNRE> por entrada de `items`.
+
+    O schema da GNRE aceita múltiplas guias dentro de <guias>; num cenário de
+    emissão em massa isso paga o cabeçalho do lote, o join final e o round-trip
+    ao webservice uma única vez para N guias.
+
+    Cada entrada é um dict com "dados_nfe" e, opcionalmente, os mesmos
+    parâmetros de build_lote_xml ("uf_favorecida", "receita",
+    "detalhamento_receita", "produto", "doc_origem_tipo", "valor_principal",
+    "data_vencimento", "razao_social_emitente", "data_pagamento").
+    """
+    _require(bool(items), "items não pode ser vazio")
+    out: list = [f'<TLote_GNRE xmlns="{GNRE_NS}" versao="2.00"><guias>']
+    for it in items:
+        _append_guia(
+            out,
+            it.get("dados_nfe") or {},
+            it.get("uf_favorecida"),
+            it.get("receita"),
+            detalhamento_receita=it.get("detalhamento_receita"),
+            produto=it.get("produto"),
+            doc_origem_tipo=it.get("doc_origem_tipo"),
+            valor_principal=it.get("valor_principal"),
+            data_vencimento=it.get("data_vencimento"),
+            razao_social_emitente=it.get("razao_social_emitente"),
+            data_pagamento=it.get("data_pagamento"),
+        )
+    out.append("</guias></TLote_GNRE>")
+    return "".join(out)
 
 def build_lote_xml_multiplas_receitas(
     dados_nfe: Dict[str, Optional[str]],
@@ -386,61 +638,40 @@ def build_lote_xml_multiplas_receitas(
     Cada guia deve ser um dict com "receita" (str de 6 dígitos) e "valor" (str decimal).
     Não chama fetch_config_uf. Detalhamento e camposExtras são carregados dos JSONs locais.
     """
+    emit_cnpj = dados_nfe.get("emitente_cnpj")
+    emit_cpf = dados_nfe.get("emitente_cpf")
     uf = (uf_favorecida or dados_nfe.get("uf_destinatario") or "").strip()
-    _require(bool(uf), "ufFavorecida é obrigatória", {"uf_favorecida": uf})
-    _require(bool(guias), "guias não pode ser vazio")
-    ident_ok = bool(dados_nfe.get("emitente_cnpj")) or bool(dados_nfe.get("emitente_cpf"))
-    _require(ident_ok, "Emitente deve possuir CNPJ ou CPF", {
-        "emitente_cnpj": dados_nfe.get("emitente_cnpj"),
-        "emitente_cpf": dados_nfe.get("emitente_cpf"),
-    })
     chave = (dados_nfe.get("chave_nfe") or "").strip()
-    _require(bool(chave) and chave.isdigit() and 1 <= len(chave) <= 44, "documentoOrigem inválido", {"chave_nfe": chave})
-    dtven = data_vencimento or _date_only(dados_nfe.get("data_emissao")) or datetime.now().date().isoformat()
-
-    ET.register_namespace("", GNRE_NS)
-    lote = ET.Element(f"{{{GNRE_NS}}}TLote_GNRE", {"versao": "2.00"})
-    guias_el = ET.SubElement(lote, f"{{{GNRE_NS}}}guias")
-    guia = ET.SubElement(guias_el, f"{{{GNRE_NS}}}TDadosGNRE", {"versao": "2.00"})
-
-    ET.SubElement(guia, f"{{{GNRE_NS}}}ufFavorecida").text = uf
-    ET.SubElement(guia, f"{{{GNRE_NS}}}tipoGnre").text = "2"
-
-    contrib_emit = ET.SubElement(guia, f"{{{GNRE_NS}}}contribuinteEmitente")
-    identificacao = ET.SubElement(contrib_emit, f"{{{GNRE_NS}}}identificacao")
-    if dados_nfe.get("emitente_cnpj"):
-        ET.SubElement(identificacao, f"{{{GNRE_NS}}}CNPJ").text = dados_nfe.get("emitente_cnpj")
-    elif dados_nfe.get("emitente_cpf"):
-        ET.SubElement(identificacao, f"{{{GNRE_NS}}}CPF").text = dados_nfe.get("emitente_cpf")
-    if dados_nfe.get("emitente_ie") and (dados_nfe.get("uf_emitente") == uf):
-        ET.SubElement(identificacao, f"{{{GNRE_NS}}}IE").text = dados_nfe.get("emitente_ie")
-    rs_text = razao_social_emitente or dados_nfe.get("emitente_nome")
-    if rs_text:
-        ET.SubElement(contrib_emit, f"{{{GNRE_NS}}}razaoSocial").text = rs_text
-    if dados_nfe.get("emitente_endereco"):
-        ET.SubElement(contrib_emit, f"{{{GNRE_NS}}}endereco").text = dados_nfe.get("emitente_endereco")
-    if dados_nfe.get("emitente_cod_mun"):
-        ET.SubElement(contrib_emit, f"{{{GNRE_NS}}}municipio").text = _mun5(dados_nfe.get("emitente_cod_mun"))
-    if dados_nfe.get("uf_emitente"):
-        ET.SubElement(contrib_emit, f"{{{GNRE_NS}}}uf").text = dados_nfe.get("uf_emitente")
-    if dados_nfe.get("emitente_cep"):
-        ET.SubElement(contrib_emit, f"{{{GNRE_NS}}}cep").text = dados_nfe.get("emitente_cep")
-    if dados_nfe.get("emitente_telefone"):
-        ET.SubElement(contrib_emit, f"{{{GNRE_NS}}}telefone").text = dados_nfe.get("emitente_telefone")
-
-    itens_el = ET.SubElement(guia, f"{{{GNRE_NS}}}itensGNRE")
+    if not uf:
+        raise GNREError("ufFavorecida é obrigatória", details={"uf_favorecida": uf})
+    if not guias:
+        raise GNREError("guias não pode ser vazio")
+    if not (emit_cnpj or emit_cpf):
+        raise GNREError("Emitente deve possuir CNPJ ou CPF", details={
+            "emitente_cnpj": emit_cnpj,
+            "emitente_cpf": emit_cpf,
+        })
+    if not _CHAVE_RE.fullmatch(chave):
+        raise GNREError("documentoOrigem inválido", details={"chave_nfe": chave})
+    dtven = data_vencimento or _date_only(dados_nfe.get("data_emissao")) or _today_iso()
+
+    out: list = [f'<TLote_GNRE xmlns="{GNRE_NS}" versao="2.00"><guias><TDadosGNRE versao="2.00">']
+    out.append("<ufFavorecida>")
+    out.append(_xml_escape(uf))
+    out.append("</ufFavorecida><tipoGnre>2</tipoGnre>")
+    _build_contribuinte_emitente(out, dados_nfe, uf, razao_social_emitente)
+
+    out.append("<itensGNRE>")
     det_map = _load_detalhamento_map()
-    valor_total_gnre = Decimal("0")
+    valor_total_gnre = _D0
 
     for g in guias:
         rec = (g.get("receita") or "").strip()
-        _require(
-            bool(rec) and rec.isdigit() and len(rec) == 6,
-            "receita de cada guia deve ter 6 dígitos",
-            {"receita": rec},
-        )
+        if not _RECEITA_RE.fullmatch(rec):
+            raise GNREError("receita de cada guia deve ter 6 dígitos", details={"receita": rec})
         vprincipal = _dec(g.get("valor"))
-        _require(vprincipal > Decimal("0"), "valor de guia deve ser positivo", {"guia": g})
+        if not vprincipal > _D0:
+            raise GNREError("valor de guia deve ser positivo", details={"guia": g})
         vfcp = _dec(g.get("valor_fcp")) if g.get("valor_fcp") else None
         guia_doc_tipo = g.get("doc_tipo") or doc_origem_tipo
         auto_det = next(
@@ -448,7 +679,7 @@ def build_lote_xml_multiplas_receitas(
             None,
         )
         _build_item(
-            itens_el,
+            out,
             uf=uf,
             receita=rec,
             dados_nfe=dados_nfe,
@@ -460,14 +691,16 @@ def build_lote_xml_multiplas_receitas(
             incluir_referencia=(uf == "RO"),
             incluir_valor_total=False,
         )
-        valor_total_gnre += vprincipal + (vfcp or Decimal("0"))
+        valor_total_gnre += vprincipal + (vfcp or _D0)
 
-    ET.SubElement(guia, f"{{{GNRE_NS}}}valorGNRE").text = f"{valor_total_gnre:.2f}"
+    out.append("</itensGNRE>")
+    out.append(f"<valorGNRE>{valor_total_gnre:.2f}</valorGNRE>")
     if data_pagamento:
-        ET.SubElement(guia, f"{{{GNRE_NS}}}dataPagamento").text = data_pagamento
-
-    xml_str = ET.tostring(lote, encoding="utf-8", xml_declaration=False)
-    return xml_str.decode("utf-8")
+        out.append("<dataPagamento>")
+        out.append(_xml_escape(data_pagamento))
+        out.append("</dataPagamento>")
+    out.append("</TDadosGNRE></guias></TLote_GNRE>")
+    return "".join(out)
 
 def needs_multiplas_receitas(dados_nfe: Dict[str, Optional[str]]) -> bool:
     """Retorna True se a NF-e deve usar múltiplas receitas (UF PE/RJ/RO/SC com 2+ tributos)."""
@@ -488,37 +721,58 @@ def build_lote_consulta_xml(
     emitente_cpf: Optional[str] = None,
     emitente_ie: Optional[str] = None,
 ) -> str:
-    _require(bool(uf), "uf obrigatória")
-    _require(tipo_consulta in {"C", "N", "D", "CD", "ND", "CR", "NR"}, "tipoConsulta inválido")
-    ET.register_namespace("", GNRE_NS)
-    lote = ET.Element(f"{{{GNRE_NS}}}TLote_ConsultaGNRE", {"versao": "2.00"})
-    consulta = ET.SubElement(lote, f"{{{GNRE_NS}}}consulta")
-    uf_el = ET.SubElement(consulta, f"{{{GNRE_NS}}}uf")
-    uf_el.text = uf
+    if not uf:
+        raise GNREError("uf obrigatória")
+    if tipo_consulta not in _TIPOS_CONSULTA:
+        raise GNREError("tipoConsulta inválido")
+    out: list = [f'<TLote_ConsultaGNRE xmlns="{GNRE_NS}" versao="2.00"><consulta>']
+    out.append("<uf>")
+    out.append(_xml_escape(uf))
+    out.append("</uf>")
     if emitente_cnpj or emitente_cpf or emitente_ie:
-        emit = ET.SubElement(consulta, f"{{{GNRE_NS}}}emitenteId")
+        out.append("<emitenteId>")
         if emitente_cnpj:
-            cnpj = ET.SubElement(emit, f"{{{GNRE_NS}}}CNPJ")
-            cnpj.text = emitente_cnpj
+            out.append("<CNPJ>")
+            out.append(_xml_escape(emitente_cnpj))
+            out.append("</CNPJ>")
         if emitente_cpf:
-            cpf = ET.SubElement(emit, f"{{{GNRE_NS}}}CPF")
-            cpf.text = emitente_cpf
+            out.append("<CPF>")
+            out.append(_xml_escape(emitente_cpf))
+            out.append("</CPF>")
         if emitente_ie:
-            ie = ET.SubElement(emit, f"{{{GNRE_NS}}}IE")
-            ie.text = emitente_ie
+            out.append("<IE>")
+            out.append(_xml_escape(emitente_ie))
+            out.append("</IE>")
+        out.append("</emitenteId>")
     if cod_barras:
-        cb = ET.SubElement(consulta, f"{{{GNRE_NS}}}codBarras")
-        cb.text = cod_barras
+        out.append("<codBarras>")
+        out.append(_xml_escape(cod_barras))
+        out.append("</codBarras>")
     if num_controle:
-        nc = ET.SubElement(consulta, f"{{{GNRE_NS}}}numControle")
-        nc.text = num_controle
+        out.append("<numControle>")
+        out.append(_xml_escape(num_controle))
+        out.append("</numControle>")
     if doc_origem and doc_tipo:
-        do = ET.SubElement(consulta, f"{{{GNRE_NS}}}docOrigem", {"tipo": doc_tipo})
-        do.text = doc_origem
-    tc = ET.SubElement(consulta, f"{{{GNRE_NS}}}tipoConsulta")
-    tc.text = tipo_consulta
-    xml_str = ET.tostring(lote, encoding="utf-8", xml_declaration=False)
-    return xml_str.decode("utf-8")
+        out.append(f'<docOrigem tipo="{_escape_attr(doc_tipo)}">')
+        out.append(_xml_escape(doc_origem))
+        out.append("</docOrigem>")
+    out.append("<tipoConsulta>")
+    out.append(tipo_consulta)
+    out.append("</tipoConsulta></consulta></TLote_ConsultaGNRE>")
+    return "".join(out)
+
+# As consultas são XMLs minúsculos onde só 2-4 valores variam: um template
+# pré-montado + format substitui a construção/serialização de árvore inteira.
+_CONS_RESULTADO_TPL = (
+    f'<TConsLote_GNRE xmlns="{GNRE_NS}">'
+    "<ambiente>{amb}</ambiente>{nr}{pdf}{ap}{nt}"
+    "</TConsLote_GNRE>"
+)
+_CONFIG_UF_TPL = (
+    f'<TConsultaConfigUf xmlns="{GNRE_NS}">'
+    "<ambiente>{amb}</ambiente>{uf}{receita}{tipos}"
+    "</TConsultaConfigUf>"
+)
 
 def build_consulta_resultado_xml(
     ambiente: str,
@@ -527,23 +781,14 @@ def build_consulta_resultado_xml(
     incluir_arquivo_pagamento: bool = False,
     incluir_noticias: bool = False,
 ) -> str:
-    ET.register_namespace("", GNRE_NS)
-    cons = ET.Element(f"{{{GNRE_NS}}}TConsLote_GNRE")
-    amb = ET.SubElement(cons, f"{{{GNRE_NS}}}ambiente")
-    amb.text = _tp_amb_gnre(ambiente)
-    nr = ET.SubElement(cons, f"{{{GNRE_NS}}}numeroRecibo")
-    nr.text = numero_recibo
-    if incluir_pdf:
-        pdf = ET.SubElement(cons, f"{{{GNRE_NS}}}incluirPDFGuias")
-        pdf.text = "S"
-    if incluir_arquivo_pagamento:
-        ap = ET.SubElement(cons, f"{{{GNRE_NS}}}incluirArquivoPagamento")
-        ap.text = "S"
-    if incluir_noticias:
-        nt = ET.SubElement(cons, f"{{{GNRE_NS}}}incluirNoticias")
-        nt.text = "S"
-    xml_str = ET.tostring(cons, encoding="utf-8", xml_declaration=False)
-    return xml_str.decode("utf-8")
+    nr = numero_recibo or ""
+    return _CONS_RESULTADO_TPL.format(
+        amb=_tp_amb_gnre(ambiente),
+        nr=f"<numeroRecibo>{_xml_escape(nr)}</numeroRecibo>" if nr else "<numeroRecibo />",
+        pdf="<incluirPDFGuias>S</incluirPDFGuias>" if incluir_pdf else "",
+        ap="<incluirArquivoPagamento>S</incluirArquivoPagamento>" if incluir_arquivo_pagamento else "",
+        nt="<incluirNoticias>S</incluirNoticias>" if incluir_noticias else "",
+    )
 
 def build_consulta_config_uf_xml(
     ambiente: str,
@@ -551,30 +796,22 @@ def build_consulta_config_uf_xml(
     receita: Optional[str] = None,
     tipos_gnre: Optional[str] = None,
 ) -> str:
-    ET.register_namespace("", GNRE_NS)
-    cons = ET.Element(f"{{{GNRE_NS}}}TConsultaConfigUf")
-    amb = ET.SubElement(cons, f"{{{GNRE_NS}}}ambiente")
-    amb.text = _tp_amb_gnre(ambiente)
-    uf_el = ET.SubElement(cons, f"{{{GNRE_NS}}}uf")
-    uf_el.text = uf
-    if receita:
-        rec = ET.SubElement(cons, f"{{{GNRE_NS}}}receita")
-        rec.text = receita
-    if tipos_gnre in {"S", "N"}:
-        tg = ET.SubElement(cons, f"{{{GNRE_NS}}}tiposGnre")
-        tg.text = tipos_gnre
-    xml_str = ET.tostring(cons, encoding="utf-8", xml_declaration=False)
-    return xml_str.decode("utf-8")
+    return _CONFIG_UF_TPL.format(
+        amb=_tp_amb_gnre(ambiente),
+        uf=f"<uf>{_xml_escape(uf)}</uf>" if uf else "<uf />",
+        receita=f"<receita>{_xml_escape(receita)}</receita>" if receita else "",
+        tipos=f"<tiposGnre>{tipos_gnre}</tiposGnre>" if tipos_gnre in _SIM_NAO else "",
+    )
 
 def _choose_receita_with_config(dados_nfe: Dict[str, Optional[str]], config: Dict[str, Any], preferida: Optional[str]) -> Optional[str]:
     vST = _dec(dados_nfe.get("valor_vST"))
     vICMSUF = _dec(dados_nfe.get("valor_vICMSUFDest"))
     if preferida and preferida in (config.get("receitas") or {}):
         return preferida
-    if vICMSUF > Decimal("0") and "100102" in (config.get("receitas") or {}):
-        return "100102"
-    if vST > Decimal("0") and "100099" in (config.get("receitas") or {}):
-        return "100099"
+    if vICMSUF > _D0 and _R_DIFAL in (config.get("receitas") or {}):
+        return _R_DIFAL
+    if vST > _D0 and _R_ST in (config.get("receitas") or {}):
+        return _R_ST
     keys = list((config.get("receitas") or {}).keys())
     return keys[0] if keys else None
 
@@ -587,9 +824,9 @@ def _choose_doc_tipo(receita_cfg: Dict[str, Any]) -> Optional[str]:
 
 def _endpoint_key(ambiente: str) -> str:
     a = (ambiente or "").strip().lower()
-    if a in {"1", "producao"}:
+    if a in _AMB_PRODUCAO:
         return "producao"
-    if a in {"2", "teste"}:
+    if a in _AMB_TESTE:
         return "teste"
     raise GNREError("Ambiente inválido", details={"ambiente": ambiente})
 
@@ -673,8 +910,8 @@ def generate_gnre_receipts(
     _require(bool(uf), "ufFavorecida é obrigatória", {"uf_favorecida": uf})
     fcp_total = Decimal(str(dados_nfe.get("valor_vFCPUFDest") or "0")) + Decimal(str(dados_nfe.get("valor_vFCPST") or "0"))
     charges = [{"tipo": "principal", "receita": None}]
-    if fcp_total > Decimal("0"):
-        charges.append({"tipo": "fcp", "receita": "100129"})
+    if fcp_total > _D0:
+        charges.append({"tipo": "fcp", "receita": _R_FCP})
     from .gnre_ws import build_soap_envelope_tlote, post_soap, get_endpoints, parse_tr_ret_lote, parse_result_status
     from .gnre_xml import build_consulta_resultado_xml
     from .gnre_ws import build_soap_envelope
@@ -745,8 +982,8 @@ def emit_gnre_receipt(
     use_multiplas = False
     if uf in MULTIPLAS_RECEITAS_UFS and guias:
         # FCP não é item separado nestas UFs: embutir como valor tipo="12" na primeira guia principal
-        fcp_guia = next((g for g in guias if g.get("receita") == "100129"), None)
-        principal_guias = [g for g in guias if g.get("receita") != "100129"]
+        fcp_guia = next((g for g in guias if g.get("receita") == _R_FCP), None)
+        principal_guias = [g for g in guias if g.get("receita") != _R_FCP]
         if fcp_guia and principal_guias:
             principal_guias[0] = {**principal_guias[0], "valor_fcp": fcp_guia["valor"]}
         guias_para_envio = principal_guias or guias
@@ -0,0 +1,49 @@
+# cython: language_level=3
+"""Aceleradores opcionais em Cython para os helpers quentes de gnre_xml.
+
+Compilado apenas quando Cython está disponível no build (ver setup.py).
+Na ausência do módulo compilado, gnre_xml segue com as versões puras em
+Python — o comportamento é idêntico.
+"""
+
+_ESCAPE_TABLE = {38: "&amp;", 60: "&lt;", 62: "&gt;", 13: "&#13;"}
+_escape_cache: dict = {}
+
+
+cpdef str _digits(s):
+    if s is None:
+        return ""
+    cdef Py_ssize_t i, n = len(s)
+    cdef list keep = []
+    for i in range(n):
+        ch = s[i]
+        # isdecimal() == categoria Nd == o \d do regex da versão pura;
+        # isdigit() aceitaria também sobrescritos e afins.
+        if ch.isdecimal():
+            keep.append(ch)
+    return "".join(keep)
+
+
+cpdef _mun5(cmun):
+    if not cmun:
+        return None
+    cdef str s = _digits(cmun)
+    cdef Py_ssize_t n = len(s)
+    if n == 7:
+        return s[2:7]
+    if n == 5:
+        return s
+    if n > 5:
+        return s[n - 5:]
+    return None
+
+
+cpdef str _xml_escape(str s):
+    if len(s) > 64:
+        return s.translate(_ESCAPE_TABLE)
+    cached = _escape_cache.get(s)
+    if cached is None:
+        cached = s.translate(_ESCAPE_TABLE)
+        if len(_escape_cache) < 4096:
+            _escape_cache[s] = cached
+    return cached
@@ -1,6 +1,9 @@
 from __future__ import annotations
 from typing import Dict, Optional
-import xml.etree.ElementTree as ET
+try:  # lxml acelera o parse quando instalado; a API usada aqui é idêntica
+    from lxml import etree as ET  # type: ignore[no-redef]
+except ImportError:
+    import xml.etree.ElementTree as ET
 from datetime import datetime
 
 NFE_NS = "{http://www.portalfiscal.inf.br/nfe}"
@@ -0,0 +1,11 @@
+from setuptools import setup
+
+# O acelerador Cython é opcional: sem Cython instalado o pacote é 100% puro
+# Python e usa os helpers equivalentes de gnre_xml.py.
+try:
+    from Cython.Build import cythonize
+    ext_modules = cythonize("gnre_automacao/gnre_xml_fast.pyx", language_level=3)
+except ImportError:
+    ext_modules = []
+
+setup(ext_modules=ext_modules)